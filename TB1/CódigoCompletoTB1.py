@@ -1,10 +1,16 @@
 # Descarga y procesamiento de la red vial real de San Juan de Lurigancho (OSM)
 # Librerías permitidas
 import osmnx as ox  # Solo para descargar datos de OpenStreetMap
-import pandas as pd  # Para guardar CSVs
-from graphviz import Graph  # Para visualizaciones sencillas
+import csv  # Para guardar CSVs (fila por fila)
+from graphviz import Source  # Para visualizaciones sencillas
 from collections import deque  # Para la implementación de BFS (cola)
+from array import array  # Arreglos compactos para la representación CSR
+from itertools import accumulate  # Suma acumulada de grados (indptr)
 import random
+import pickle  # Para guardar en disco el grafo ya descargado
+import os
+import re  # Para armar el nombre del archivo de caché a partir del lugar
+from pathlib import Path
 
 # Configuración
 ox.settings.use_cache = True
@@ -15,40 +21,84 @@ print("Descargando red vial de San Juan de Lurigancho desde OpenStreetMap...")
 # 1. Descarga de la red OSM
 # Aquí se usa osmnx para obtener la red 'drive' (calles transitables por vehículos)
 lugar = "San Juan de Lurigancho, Lima, Peru"
+tipo_red = 'drive'
+simplificar = True
+
+# Caché del grafo ya construido: ox.settings.use_cache solo guarda la respuesta
+# HTTP, así que sin este archivo cada ejecución vuelve a construir el grafo
+# El nombre depende del lugar, el tipo de red y la simplificación: si alguno
+# cambia se usa otro archivo en lugar de reutilizar un grafo que no corresponde
+slug_lugar = re.sub(r'\W+', '_', lugar.lower()).strip('_')
+sufijo_simplificacion = 'simplificado' if simplificar else 'completo'
+ruta_cache = Path(f'osm_{slug_lugar}_{tipo_red}_{sufijo_simplificacion}.pkl')
+
+grafo_osm = None
+
+# Si la caché existe pero está dañada (p. ej. una escritura interrumpida),
+# la ignoramos y volvemos a descargar en lugar de terminar el script
+if ruta_cache.exists():
+    try:
+        with ruta_cache.open('rb') as f:
+            grafo_osm = pickle.load(f)
+        print(f"Red vial '{tipo_red}' de {lugar} cargada desde la caché local ({ruta_cache}).")
+    except (OSError, pickle.UnpicklingError, EOFError) as e:
+        print(f"No se pudo leer la caché local ({ruta_cache}), se descargará de nuevo:", e)
+        grafo_osm = None
+
+if grafo_osm is None:
+    try:
+        # osmnx devuelve internamente un grafo compatible con networkx
+        # NO importamos ni usamos networkx en este script; solo aprovechamos la descarga
+        grafo_osm = ox.graph_from_place(lugar, network_type=tipo_red, simplify=simplificar)
+        print("Red vial descargada correctamente desde OSM.")
+    except Exception as e:
+        print("Error descargando OSM:", e)
+        print("Verifica conexión o intenta usar coordenadas en lugar del nombre del lugar.")
+        raise SystemExit(1)
+
+    # Guardamos la caché en un archivo temporal y luego lo renombramos:
+    # os.replace es atómico, así nunca queda una caché a medio escribir.
+    # Si falla solo avisamos, el grafo descargado se sigue usando
+    ruta_temporal = ruta_cache.with_name(ruta_cache.name + '.tmp')
+    try:
+        with ruta_temporal.open('wb') as f:
+            pickle.dump(grafo_osm, f, protocol=5)
+        os.replace(ruta_temporal, ruta_cache)
+    except (OSError, pickle.PicklingError) as e:
+        print(f"Aviso: no se pudo guardar la caché local ({ruta_cache}):", e)
+        # Borramos el temporal a medio escribir (si tampoco se puede, lo dejamos)
+        try:
+            ruta_temporal.unlink(missing_ok=True)
+        except OSError:
+            pass
 
-try:
-    # osmnx devuelve internamente un grafo compatible con networkx
-    # NO importamos ni usamos networkx en este script; solo aprovechamos la descarga
-    grafo_osm = ox.graph_from_place(lugar, network_type='drive', simplify=True)
-    print("Red vial descargada correctamente desde OSM.")
-    print(f"   (Objeto obtenido: grafo_osm con nodos y aristas de OSM)\n")
-except Exception as e:
-    print("Error descargando OSM:", e)
-    print("Verifica conexión o intenta usar coordenadas en lugar del nombre del lugar.")
-    raise SystemExit(1)
+print(f"   (Objeto obtenido: grafo_osm con nodos y aristas de OSM)\n")
 
 # 2. Construcción del grafo
-#    - Lista de adyacencia con pesos
-#    - Diccionario: { nodo: [(vecino, distancia_metros, tiempo_minutos), ...], ... }
+#    - Representación CSR (Compressed Sparse Row) con pesos
+#    - nodos_ids: lista de ids OSM; el nodo i del CSR es nodos_ids[i]
+#    - indice: diccionario { nodo_id: i }
+#    - Los vecinos del nodo i están en las posiciones indptr[i] .. indptr[i+1]-1
+#      de los arreglos paralelos indices (vecino), distancias y duraciones
+#    Así evitamos guardar una tupla por arista y los recorridos solo leen números
+#    distancias y duraciones usan float32 ('f'): las longitudes OSM tienen una
+#    precisión de ~1 m, así que la mitad de bytes basta y los recorridos leen menos memoria
 
 # Parámetros de conversión distancia -> tiempo
 velocidad_kmh = 30.0  # velocidad promedio urbana
+# Factor precalculado: minutos = metros / 1000 / velocidad_kmh * 60
+MINUTOS_POR_METRO = 60.0 / (velocidad_kmh * 1000.0)
 
-
-def metros_a_minutos(dist_m):
-    """Convierte distancia en metros a tiempo en minutos"""
-    distancia_km = dist_m / 1000.0
-    minutos = (distancia_km / velocidad_kmh) * 60.0
-    return round(minutos, 2)
-
+# Valores del atributo 'oneway' que indican una calle de doble sentido
+# (frozenset: la pertenencia es O(1) y los hashes se calculan una sola vez)
+DOBLE_SENTIDO = frozenset((False, 'false', 'False', 0, None))
 
 # Construimos:
 # - nodos_info: diccionario con coordenadas { nodo_id: (longitud, latitud) }
-# - lista_ady: diccionario de adyacencia { nodo: [(vecino, length, tiempo), ...], ... }
+# - el grafo CSR descrito arriba
 nodos_info = {}
-lista_ady = {}
 
-print("Construyendo lista de adyacencia...")
+print("Construyendo grafo en formato CSR...")
 
 # Paso 1: Extraer nodos
 # Recorremos todos los nodos del grafo OSM
@@ -57,214 +107,254 @@ for nodo, data in grafo_osm.nodes(data=True):
     x = data.get('x', 0.0)
     y = data.get('y', 0.0)
     nodos_info[nodo] = (x, y)
-    # Inicializamos la lista de vecinos vacía para cada nodo
-    lista_ady[nodo] = []
 
-# Paso 2: Extraer aristas
-# Recorremos todas las aristas del grafo OSM
+nodos_ids = list(nodos_info)
+indice = {nid: i for i, nid in enumerate(nodos_ids)}
+
+# Paso 2: Extraer aristas y contar grados
+# Los arreglos se reservan con el tamaño exacto (grafo_osm.number_of_edges())
+# y se llenan por posición, sin listas que crezcan arista por arista
 # osmnx devuelve aristas con formato (u, v, key, data)
-for u, v, key, data in grafo_osm.edges(data=True, keys=True):
+num_aristas_osm = grafo_osm.number_of_edges()
+origenes = array('q', [0]) * num_aristas_osm
+destinos = array('q', [0]) * num_aristas_osm
+longitudes = array('d', [0.0]) * num_aristas_osm
+doble = bytearray(num_aristas_osm)  # 1 = calle de doble sentido
+grado = array('q', [0]) * len(nodos_ids)
+
+for e, (u, v, key, data) in enumerate(grafo_osm.edges(data=True, keys=True)):
     # Obtenemos la longitud de la arista (distancia en metros)
     length = data.get('length', None)
     if length is None:
         # Si falta longitud, asignamos valor por defecto (100 m)
         length = 100.0
 
-    # Convertimos distancia a tiempo
-    tiempo = metros_a_minutos(length)
-
-    # Añadimos la arista a la lista de adyacencia
-    # Formato: lista_ady[u] = [(vecino, distancia, tiempo), ...]
-    lista_ady[u].append((v, float(length), tiempo))
-
-    # Verificamos si la calle es de doble sentido
+    iu = indice[u]
+    iv = indice[v]
+    origenes[e] = iu
+    destinos[e] = iv
+    longitudes[e] = float(length)
+    grado[iu] += 1
+
+    # Si la calle no es de un solo sentido, también cuenta la arista opuesta
+    # oneway casi siempre es un bool: True se descarta sin consultar el conjunto.
+    # Una lista (aristas fusionadas al simplificar) no es hashable y nunca fue
+    # un valor de doble sentido, así que también se descarta aquí
     oneway = data.get('oneway', None)
-    # Si no es de un solo sentido, añadimos también la arista opuesta
-    if oneway in (False, 'false', 'False', 0, None):
-        lista_ady[v].append((u, float(length), tiempo))
-
-print("Lista de adyacencia construida.")
+    if oneway is True or isinstance(oneway, list):
+        continue
+    if oneway in DOBLE_SENTIDO:
+        doble[e] = 1
+        grado[iv] += 1
+
+# Convertimos todas las distancias a tiempo en un solo recorrido,
+# con una sola multiplicación por arista
+tiempos = [round(length * MINUTOS_POR_METRO, 2) for length in longitudes]
+
+# Paso 3: indptr es la suma acumulada de los grados
+indptr = array('q', accumulate(grado, initial=0))
+
+# Paso 4: Llenar indices, distancias y duraciones
+# cursor[i] es la siguiente posición libre dentro del rango del nodo i;
+# el orden de los vecinos es el mismo en que aparecen las aristas en grafo_osm
+total_entradas = indptr[-1]
+indices = array('i', [0]) * total_entradas
+distancias = array('f', [0.0]) * total_entradas
+duraciones = array('f', [0.0]) * total_entradas
+cursor = indptr[:-1]
+
+for e in range(num_aristas_osm):
+    u = origenes[e]
+    v = destinos[e]
+
+    pos = cursor[u]
+    indices[pos] = v
+    distancias[pos] = longitudes[e]
+    duraciones[pos] = tiempos[e]
+    cursor[u] = pos + 1
+
+    # Arista opuesta para calles de doble sentido
+    if doble[e]:
+        pos = cursor[v]
+        indices[pos] = u
+        distancias[pos] = longitudes[e]
+        duraciones[pos] = tiempos[e]
+        cursor[v] = pos + 1
+
+print("Grafo CSR construido.")
 print(f"Nodos registrados: {len(nodos_info)}")
 
-# Contar aristas
-num_aristas = 0
-for nodo in lista_ady:
-    num_aristas = num_aristas + len(lista_ady[nodo])
-num_aristas = num_aristas // 2  # Dividimos entre 2 porque contamos cada arista dos veces
+# Contar aristas: cada arista no dirigida aparece dos veces en indices
+num_aristas = len(indices) // 2
 
 print(f"Aristas aproximadas: {num_aristas}\n")
 
 
-# 3. Conectividad: obtener componente gigante (BFS)
-#    - Implementación BFS (cola)
+# 3. Conectividad: obtener componente gigante (Union-Find)
+#    - Unión por rango y compresión de caminos: O(E·α(V)) en una sola pasada
 
-def BFS_componente(grafo_adj, inicio):
+def buscar_raiz(padre, x):
     """
-    BFS que devuelve el conjunto de nodos alcanzables desde 'inicio'
-    grafo_adj: diccionario de adyacencia { nodo: [(vecino, dist, tiempo), ...], ... }
+    Devuelve el representante del conjunto de 'x'
+    Aplica compresión de caminos (cada nodo apunta a su abuelo)
     """
-    visitados = set()
-    colaAuxiliar = deque([inicio])
-    visitados.add(inicio)
+    while padre[x] != x:
+        padre[x] = padre[padre[x]]
+        x = padre[x]
+    return x
 
-    while colaAuxiliar:
-        nodo = colaAuxiliar.popleft()
-        # Recorremos todos los vecinos del nodo actual
-        for vecino_info in grafo_adj.get(nodo, []):
-            vecino = vecino_info[0]  # El vecino es el primer elemento de la tupla
-            if vecino not in visitados:
-                colaAuxiliar.append(vecino)
-                visitados.add(vecino)
-
-    return visitados
-
-
-# Revisar conectividad general iterando componentes
-print("Verificar componentes conexas con BFS...")
-
-todos_nodos = set()
-# Agregar todos los nodos a un conjunto
-for nodo in lista_ady.keys():
-    todos_nodos.add(nodo)
-
-componentes = []
-visitados_global = set()
-
-# Recorremos todos los nodos para encontrar componentes
-for nodo in todos_nodos:
-    if nodo not in visitados_global:
-        # Encontramos una nueva componente
-        comp = BFS_componente(lista_ady, nodo)
-        componentes.append(comp)
-        # Agregamos todos los nodos de esta componente a visitados_global
-        for n in comp:
-            visitados_global.add(n)
-
-# Ordenar componentes por tamaño (de mayor a menor)
-# Usamos una lista auxiliar con tuplas (tamaño, componente)
-componentes_con_tamanio = []
-for comp in componentes:
-    componentes_con_tamanio.append((len(comp), comp))
-
-# Ordenamos por tamaño (primer elemento de la tupla)
-componentes_con_tamanio.sort(reverse=True)
-
-# Extraemos solo las componentes ordenadas
-componentes = []
-for tamanio, comp in componentes_con_tamanio:
-    componentes.append(comp)
+
+def componentes_union_find(indptr, indices, n):
+    """
+    Devuelve un arreglo comp donde comp[i] es el representante de la componente del nodo i
+    indptr, indices: grafo en formato CSR (los nodos son posiciones 0..n-1)
+    """
+    padre = array('q', range(n))
+    rango = bytearray(n)
+
+    # Unimos los extremos de cada arista recorriendo el CSR una sola vez
+    for u in range(n):
+        # La raíz de u se busca una vez por nodo: tras cada unión sigue siendo
+        # raiz_u (el árbol ganador), así que no hace falta repetir la búsqueda
+        raiz_u = buscar_raiz(padre, u)
+        for k in range(indptr[u], indptr[u + 1]):
+            raiz_v = buscar_raiz(padre, indices[k])
+            if raiz_u == raiz_v:
+                continue
+            # Unión por rango: el árbol más bajo cuelga del más alto
+            if rango[raiz_u] < rango[raiz_v]:
+                raiz_u, raiz_v = raiz_v, raiz_u
+            padre[raiz_v] = raiz_u
+            if rango[raiz_u] == rango[raiz_v]:
+                rango[raiz_u] += 1
+
+    return array('q', [buscar_raiz(padre, i) for i in range(n)])
+
+
+# Revisar conectividad general
+print("Verificar componentes conexas con Union-Find...")
+
+comp = componentes_union_find(indptr, indices, len(nodos_ids))
+
+# Tamaño de cada componente (indexado por su representante)
+tamanios = [0] * len(nodos_ids)
+for raiz in comp:
+    tamanios[raiz] += 1
+
+num_componentes = len(nodos_ids) - tamanios.count(0)
 
 # La componente principal es la más grande
-if len(componentes) > 0:
-    componente_principal = componentes[0]
+if num_componentes > 0:
+    raiz_principal = max(range(len(nodos_ids)), key=tamanios.__getitem__)
+    componente_principal = [i for i in range(len(nodos_ids)) if comp[i] == raiz_principal]
 else:
-    componente_principal = set()
+    componente_principal = []
 
-if len(componentes) <= 1:
+if num_componentes <= 1:
     print("El grafo está completamente conectado (1 componente).")
 else:
-    print(f"Grafo con {len(componentes)} componentes. Usaremos el componente principal (el mayor).")
+    print(f"Grafo con {num_componentes} componentes. Usaremos el componente principal (el mayor).")
     print(f"Tamaño componente principal: {len(componente_principal)} nodos")
 
-    # Reducir lista de adyacencia al componente principal
-    # Paso 1: Crear nueva lista de adyacencia solo con nodos del componente principal
-    nueva_lista_ady = {}
-    for nodo in componente_principal:
-        nueva_lista_ady[nodo] = []
-        # Recorremos los vecinos del nodo
-        for vecino_info in lista_ady[nodo]:
-            vecino = vecino_info[0]
-            length = vecino_info[1]
-            tiempo = vecino_info[2]
-            # Solo agregamos el vecino si también está en el componente principal
-            if vecino in componente_principal:
-                nueva_lista_ady[nodo].append((vecino, length, tiempo))
-
-    # Reemplazamos la lista de adyacencia
-    lista_ady = nueva_lista_ady
-
-    # Paso 2: Actualizar nodos_info solo con nodos del componente principal
-    nueva_nodos_info = {}
-    for nodo in componente_principal:
-        nueva_nodos_info[nodo] = nodos_info[nodo]
-
-    nodos_info = nueva_nodos_info
+    # Reducir el CSR al componente principal
+    # Paso 1: Renumerar los nodos del componente principal como 0..m-1
+    #         (nuevo_indice = -1 para los nodos que quedan fuera)
+    cp = componente_principal
+    nuevo_indice = array('q', [-1]) * len(nodos_ids)
+    for nuevo, viejo in enumerate(cp):
+        nuevo_indice[viejo] = nuevo
+
+    # Paso 2: Copiar solo los vecinos que también están en el componente principal
+    nuevo_indptr = array('q', [0])
+    nuevo_indices = array('i')
+    nuevo_distancias = array('f')
+    nuevo_duraciones = array('f')
+    for viejo in cp:
+        for k in range(indptr[viejo], indptr[viejo + 1]):
+            vecino = nuevo_indice[indices[k]]
+            if vecino >= 0:
+                nuevo_indices.append(vecino)
+                nuevo_distancias.append(distancias[k])
+                nuevo_duraciones.append(duraciones[k])
+        nuevo_indptr.append(len(nuevo_indices))
+
+    # Reemplazamos el CSR
+    indptr = nuevo_indptr
+    indices = nuevo_indices
+    distancias = nuevo_distancias
+    duraciones = nuevo_duraciones
+
+    # Paso 3: Actualizar nodos_ids y nodos_info solo con nodos del componente principal
+    nodos_ids = [nodos_ids[i] for i in cp]
+    nodos_info = {n: nodos_info[n] for n in nodos_ids}
 
 # 4. Guardar CSVs de aristas y nodos 
 print("\nGuardando archivos CSV (aristas y nodos)...")
 
+# Tabla de nombres de calle { (menor_id, mayor_id): nombre }
+# Se construye con una sola pasada por las aristas de grafo_osm; en cada par
+# nos quedamos con el primer nombre encontrado
+nombres_calle = {}
+for u, v, key, data in grafo_osm.edges(keys=True, data=True):
+    par = (u, v) if u <= v else (v, u)
+    nombres_calle.setdefault(par, data.get('name') or 'Sin nombre')
+
 # Aristas: para evitar duplicados en grafo no dirigido, almacenamos pares u<v
-aristas_reg = []
+# Cada arista se escribe en el archivo apenas se genera (csv.writer), sin
+# acumular filas en memoria ni construir un DataFrame
+# visto guarda cada par de posiciones CSR empaquetado en un solo entero:
+# (menor << 32) | mayor  (las posiciones son compactas, caben en 32 bits)
 visto = set()
+m = 0
 
-for u in lista_ady:
-    lista_vec = lista_ady[u]
-    # Recorremos todos los vecinos de u
-    for vecino_info in lista_vec:
-        v = vecino_info[0]
-        length = vecino_info[1]
-        tiempo = vecino_info[2]
+with open('grafo_sjl_osm.csv', 'w', newline='', encoding='utf-8') as archivo:
+    escritor = csv.writer(archivo, lineterminator='\n')
+    escritor.writerow(['origen', 'destino', 'distancia_metros', 'tiempo_minutos', 'nombre_calle'])
 
-        # Usar par ordenado para evitar duplicados (u,v) y (v,u)
-        if u <= v:
-            par = (u, v)
-        else:
-            par = (v, u)
+    for i in range(len(nodos_ids)):
+        u = nodos_ids[i]
+        # Recorremos todos los vecinos de u (su rango en el CSR)
+        for k in range(indptr[i], indptr[i + 1]):
+            j = indices[k]
 
-        # Si ya procesamos este par, lo saltamos
-        if par in visto:
-            continue
-        visto.add(par)
+            # Clave del par sin orden para evitar duplicados (u,v) y (v,u)
+            if i <= j:
+                clave = (i << 32) | j
+            else:
+                clave = (j << 32) | i
 
-        # Intentamos obtener nombre de la calle desde grafo_osm
-        nombre = None
-        try:
-            edge_data = grafo_osm.get_edge_data(u, v)
-            if edge_data:
-                # edge_data puede ser dict de keys -> dicts
-                if isinstance(edge_data, dict):
-                    # Tomamos el primer key disponible
-                    primera_key = list(edge_data.keys())[0]
-                    first = edge_data[primera_key]
-                    nombre = first.get('name', None)
-        except Exception:
-            nombre = None
-
-        # Si no tiene nombre, ponemos "Sin nombre"
-        if nombre is None:
-            nombre = 'Sin nombre'
-
-        # Agregamos la arista a nuestra lista
-        aristas_reg.append({
-            'origen': par[0],
-            'destino': par[1],
-            'distancia_metros': length,
-            'tiempo_minutos': tiempo,
-            'nombre_calle': nombre
-        })
-
-# Guardar CSV de aristas
-df_aristas = pd.DataFrame(aristas_reg)
-df_aristas.to_csv('grafo_sjl_osm.csv', index=False, encoding='utf-8')
-print(f"grafo_sjl_osm.csv guardado: {len(df_aristas)} aristas")
+            # Si ya procesamos este par, lo saltamos
+            if clave in visto:
+                continue
+            visto.add(clave)
+
+            v = nodos_ids[j]
+
+            # Par ordenado por id OSM para el CSV y la tabla de nombres
+            if u <= v:
+                par = (u, v)
+            else:
+                par = (v, u)
+
+            # Nombre de la calle desde la tabla precalculada (O(1) por arista)
+            nombre = nombres_calle.get(par, 'Sin nombre')
+
+            # Redondeamos al leer de float32 para no escribir dígitos espurios:
+            # 3 decimales en la distancia (precisión original de OSM) y 2 en el tiempo
+            escritor.writerow([par[0], par[1], round(distancias[k], 3), round(duraciones[k], 2), nombre])
+            m += 1
+
+print(f"grafo_sjl_osm.csv guardado: {m} aristas")
 
 # Nodos: id, latitud (y), longitud (x)
-nodos_reg = []
-for nodo in nodos_info:
-    coordenadas = nodos_info[nodo]
-    x = coordenadas[0]  # longitud
-    y = coordenadas[1]  # latitud
-
-    nodos_reg.append({
-        'nodo_id': nodo,
-        'latitud': y,
-        'longitud': x
-    })
-
-# Guardar CSV de nodos
-df_nodos = pd.DataFrame(nodos_reg)
-df_nodos.to_csv('nodos_sjl_osm.csv', index=False, encoding='utf-8')
-print(f"nodos_sjl_osm.csv guardado: {len(df_nodos)} nodos")
+with open('nodos_sjl_osm.csv', 'w', newline='', encoding='utf-8') as archivo:
+    escritor = csv.writer(archivo, lineterminator='\n')
+    escritor.writerow(['nodo_id', 'latitud', 'longitud'])
+    for nodo in nodos_info:
+        x, y = nodos_info[nodo]  # (longitud, latitud)
+        escritor.writerow([nodo, y, x])
+
+print(f"nodos_sjl_osm.csv guardado: {len(nodos_info)} nodos")
 
 # 5. Visualizaciones
 print("\nGenerando visualizaciones...")
@@ -274,63 +364,58 @@ print("Generando mapa completo de SJL...")
 try:
     import matplotlib.pyplot as plt
 
+    # Solo dibujamos las calles (node_size=0 evita un punto por intersección) y
+    # guardamos en SVG: es vectorial, así no se rasteriza el mapa a 300 dpi
     fig, ax = plt.subplots(figsize=(15, 15), facecolor='white')
-    ox.plot_graph(grafo_osm, ax=ax, node_size=5, node_color='blue', node_alpha=0.4,
-                  edge_color='gray', edge_linewidth=0.5, bgcolor='white', show=False, close=False)
-    plt.title('Red Vial Completa de San Juan de Lurigancho (OpenStreetMap)', fontsize=16, fontweight='bold', pad=20)
-    plt.tight_layout()
-    plt.savefig('red_completa_sjl.png', dpi=300, bbox_inches='tight')
+    ox.plot_graph(grafo_osm, ax=ax, node_size=0, edge_color='gray', edge_linewidth=0.3,
+                  bgcolor='white', show=False, close=False)
+    ax.set_title('Red Vial Completa de San Juan de Lurigancho (OpenStreetMap)', fontsize=16, fontweight='bold', pad=20)
+    fig.savefig('red_completa_sjl.svg', bbox_inches='tight')
     plt.close(fig)
-    print("red_completa_sjl.png generada (mapa completo).")
+    print("red_completa_sjl.svg generada (mapa completo).")
 except Exception as e:
     print("No se pudo generar el mapa completo con osmnx.plot_graph:", e)
 
 # 5.2 Subgrafo de 100 nodos con graphviz
 print("Seleccionando subgrafo de 100 nodos mediante BFS...")
 
+# Trabajamos con las posiciones CSR (0..n-1) de los nodos
 # Si el grafo tiene menos de 100 nodos, usamos todos
-if len(lista_ady) <= 100:
-    subgrafo_nodos = []
-    for nodo in lista_ady.keys():
-        subgrafo_nodos.append(nodo)
+if len(nodos_ids) <= 100:
+    subgrafo_nodos = list(range(len(nodos_ids)))
 else:
     # Seleccionamos 100 nodos usando BFS desde un nodo aleatorio
-    # Convertimos las keys a lista para poder elegir un nodo aleatorio
-    lista_nodos = []
-    for nodo in lista_ady.keys():
-        lista_nodos.append(nodo)
-
-    nodo_inicio = random.choice(lista_nodos)
+    nodo_inicio = random.randrange(len(nodos_ids))
     subgrafo_nodos = []
     colaAuxiliar = deque([nodo_inicio])
-    visitados_local = set([nodo_inicio])
+    # Marcas de visitado: un byte por posición CSR (1 = visitado) en lugar de un set
+    visitados_local = bytearray(len(nodos_ids))
+    visitados_local[nodo_inicio] = 1
 
     # BFS para obtener 100 nodos
     while len(colaAuxiliar) > 0 and len(subgrafo_nodos) < 100:
         nodo = colaAuxiliar.popleft()
         subgrafo_nodos.append(nodo)
 
-        # Obtener vecinos del nodo actual
-        vecinos = []
-        for vecino_info in lista_ady.get(nodo, []):
-            vecino = vecino_info[0]
-            vecinos.append(vecino)
-
-        # Mezclar vecinos aleatoriamente
-        random.shuffle(vecinos)
-
-        # Agregar vecinos no visitados a la cola
-        for vec in vecinos:
-            if vec not in visitados_local and len(subgrafo_nodos) + len(colaAuxiliar) < 1000:
-                visitados_local.add(vec)
+        # Recorremos los vecinos en orden aleatorio eligiendo una permutación
+        # de sus posiciones en el CSR (sin copiar la lista de vecinos)
+        inicio_vec = indptr[nodo]
+        fin_vec = indptr[nodo + 1]
+        for k in random.sample(range(inicio_vec, fin_vec), fin_vec - inicio_vec):
+            vec = indices[k]
+            # Agregar vecinos no visitados a la cola
+            if not visitados_local[vec]:
+                visitados_local[vec] = 1
                 colaAuxiliar.append(vec)
 
     # Si aún faltan nodos, completar aleatoriamente
     if len(subgrafo_nodos) < 100:
         faltan = 100 - len(subgrafo_nodos)
+        # Si la cola se vació, los visitados son exactamente los nodos elegidos,
+        # así que usamos sus marcas en lugar de buscar en la lista subgrafo_nodos
         extras = []
-        for n in lista_ady.keys():
-            if n not in subgrafo_nodos:
+        for n in range(len(nodos_ids)):
+            if not visitados_local[n]:
                 extras.append(n)
 
         random.shuffle(extras)
@@ -339,33 +424,33 @@ else:
             subgrafo_nodos.append(extras[i])
 
 # Construir subgrafo de adyacencia (solo nodos seleccionados)
-# Convertimos la lista a set para búsquedas más rápidas
-conjunto_subgrafo = set(subgrafo_nodos)
-
-subgrafo_ady = {}
+# Marcamos los nodos elegidos en un bytearray indexado por posición CSR:
+# la pertenencia al subgrafo es una lectura directa, sin calcular hashes
+en_subgrafo = bytearray(len(nodos_ids))
 for n in subgrafo_nodos:
-    subgrafo_ady[n] = []
-    # Recorremos los vecinos de n
-    for vecino_info in lista_ady.get(n, []):
-        v = vecino_info[0]
-        l = vecino_info[1]
-        t = vecino_info[2]
-        # Solo agregamos el vecino si está en el subgrafo
-        if v in conjunto_subgrafo:
-            subgrafo_ady[n].append((v, l, t))
-
-# Crear visualización con graphviz 
+    en_subgrafo[n] = 1
+
+# subgrafo_ady usa los ids OSM para que las etiquetas sean las originales
+# Para cada nodo filtramos su rango del CSR dejando solo vecinos del subgrafo
+subgrafo_ady = {
+    nodos_ids[n]: [(nodos_ids[indices[k]], distancias[k], duraciones[k])
+                   for k in range(indptr[n], indptr[n + 1]) if en_subgrafo[indices[k]]]
+    for n in subgrafo_nodos
+}
+
+# Crear visualización con graphviz
+# Armamos el texto DOT completo en una lista de líneas y lo unimos una sola vez,
+# en lugar de llamar a g.node() / g.edge() por cada nodo y arista
 print("Crear visualización con graphviz...")
-g = Graph('Subgrafo_100_SJL', format='png')
+lineas_dot = ['graph Subgrafo_100_SJL {']
 
 # Configurar tamaño y orientación del documento
-g.attr(size='8,10')  # Ancho de 8 pulgadas, alto de 10 pulgadas
-g.attr(dpi='300')  # Resolución moderada
-g.attr(ratio='compress')  # Comprimir para ajustar mejor
+lineas_dot.append('\tsize="8,10"')  # Ancho de 8 pulgadas, alto de 10 pulgadas
+lineas_dot.append('\tdpi=300')  # Resolución moderada
+lineas_dot.append('\tratio=compress')  # Comprimir para ajustar mejor
 
 # Agregar nodos al grafo con etiquetas visibles
-for nodo in subgrafo_ady.keys():
-    g.node(str(nodo), label=str(nodo))
+lineas_dot += [f'\t{nodo} [label={nodo}]' for nodo in subgrafo_ady]
 
 # Agregar aristas sin duplicar (u<v)
 agregado = set()
@@ -375,13 +460,9 @@ for u in subgrafo_ady:
     for vecino_info in vecinos:
         v = vecino_info[0]
         length = vecino_info[1]
-        tiempo = vecino_info[2]
 
-        # Crear par ordenado para evitar duplicados
-        if str(u) <= str(v):
-            par = (u, v)
-        else:
-            par = (v, u)
+        # Crear par ordenado para evitar duplicados (comparando los ids enteros)
+        par = (u, v) if u <= v else (v, u)
 
         # Si ya agregamos esta arista, la saltamos
         if par in agregado:
@@ -389,8 +470,10 @@ for u in subgrafo_ady:
         agregado.add(par)
 
         # Etiqueta con distancia en metros
-        etiqueta = f"{int(length)} m"
-        g.edge(str(par[0]), str(par[1]), label=etiqueta)
+        lineas_dot.append(f'\t{par[0]} -- {par[1]} [label="{int(length)} m"]')
+
+lineas_dot.append('}')
+g = Source('\n'.join(lineas_dot) + '\n')
 
 # Renderizar imagen del subgrafo
 try:
@@ -405,20 +488,14 @@ print("\nESTADÍSTICAS DEL GRAFO REAL DE SJL:")
 total_nodos = len(nodos_info)
 
 # Para contar aristas en grafo no dirigido sumamos grados y dividimos por 2
-suma_grados = 0
-for nodo in lista_ady:
-    vecs = lista_ady[nodo]
-    suma_grados = suma_grados + len(vecs)
-
-total_aristas = suma_grados / 2.0
-
-# Distancia total en km
-dist_total_metros = 0
-for u in lista_ady:
-    lista = lista_ady[u]
-    for vecino_info in lista:
-        length = vecino_info[1]
-        dist_total_metros = dist_total_metros + length
+# En CSR la suma de grados es directamente la cantidad de entradas de indices
+suma_grados = len(indices)
+
+total_aristas = suma_grados // 2
+
+# Distancia total en km (una sola reducción sobre el arreglo de distancias)
+# sum() acumula en un float de Python (64 bits), así no se pierde precisión
+dist_total_metros = sum(distancias)
 
 # Dividimos entre 2 porque contamos cada arista dos veces
 dist_total_km = (dist_total_metros / 2.0) / 1000.0
@@ -432,7 +509,7 @@ else:
 print(f"Total de intersecciones (nodos): {total_nodos}")
 print(f" Total de calles (aristas, aprox): {int(total_aristas)}")
 
-if len(componentes) == 1:
+if num_componentes == 1:
     print(f"   • Conectividad: Conectado (componente principal usado)")
 else:
     print(f"Conectividad: No completamente conectado — se usó componente principal")
@@ -443,5 +520,5 @@ print(f"Grado promedio (calles por intersección): {grado_promedio:.2f}")
 print("\nProceso completado. Archivos generados:")
 print("grafo_sjl_osm.csv")
 print("nodos_sjl_osm.csv")
-print("red_completa_sjl.png")
+print("red_completa_sjl.svg")
 print("subgrafo_100_sjl_osm.png\n")